@@ -10,6 +10,10 @@ STR_CONVERSIONS = {"/": "%2F", ":": "%3A"}
 
 DATATYPES = Literal["candles", "trades", "funding"]
 
+# Float columns which may be stored in single precision. Candle volumes
+# are kept in double precision, as they can be too large to store exactly
+FLOAT32_COLUMNS = {"Open", "High", "Low", "Close", "price", "amount", "cost"}
+
 # Exchanges from CCXT v4.1.78
 CCXT_EXCHANGES = Literal[
     "alpaca",
@@ -1,24 +1,151 @@
 import os
-import pytz
+import re
+import json
+import ssl
+import time
+import socket
+import certifi
 import asyncio
+import aiohttp
 import logging
+import numpy as np
+import random
 import pandas as pd
+import pyarrow as pa
 import ccxt.pro as ccxt
+import pyarrow.parquet as pq
 from aiolimiter import AsyncLimiter
-from datetime import datetime, timedelta
-from typing import Optional, Union, Coroutine
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union, Callable, Coroutine, Iterable
 from ccxt_download import CANDLES, TRADES, FUNDING
-from ccxt_download.constants import DATATYPES, CCXT_EXCHANGES, DEFAULT_DOWNLOAD_DIR
+from ccxt_download.constants import (
+    DATATYPES,
+    CCXT_EXCHANGES,
+    DEFAULT_DOWNLOAD_DIR,
+    FLOAT32_COLUMNS,
+)
 from ccxt_download.utilities import (
     filename_builder,
     timedelta_from_str,
-    _period_start,
-    _timestep_from_timedelta,
+    _period_edges,
 )
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying a request for
+_TRANSIENT_ERRORS = (
+    ccxt.NetworkError,
+    ccxt.ExchangeNotAvailable,
+    ccxt.RateLimitExceeded,
+    asyncio.TimeoutError,
+)
+_RETRY_AFTER = re.compile(r"retry[-_ ]?after\W*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+# Temporary files are named after the process writing them, and are
+# considered abandoned once untouched for a day
+_TMP_PID = re.compile(r"\.(\d+)\.tmp$")
+_STALE_TMP_AGE = 24 * 60 * 60
+
+
+def _pandas_schema(fields: list[tuple[str, pa.DataType]], index: str) -> pa.Schema:
+    """Returns an arrow schema with the pandas metadata needed to
+    restore the index column when the file is read with pandas."""
+    schema = pa.schema(fields)
+    df = schema.empty_table().to_pandas().set_index(index)
+    return schema.with_metadata(pa.Schema.from_pandas(df).metadata)
+
+
+# Arrow schemas of the data written to disk
+_TIMESTAMP = pa.timestamp("ms", tz="UTC")
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+_CANDLES_SCHEMA = _pandas_schema(
+    [
+        ("Timestamp", _TIMESTAMP),
+        ("Open", pa.float64()),
+        ("High", pa.float64()),
+        ("Low", pa.float64()),
+        ("Close", pa.float64()),
+        ("Volume", pa.float64()),
+        ("exchange", _CATEGORY),
+        ("symbol", _CATEGORY),
+    ],
+    index="Timestamp",
+)
+_TRADES_FEE = pa.struct(
+    [("cost", pa.float64()), ("currency", pa.string()), ("rate", pa.float64())]
+)
+_TRADES_RAW_SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.int64()),
+        ("symbol", pa.string()),
+        ("side", pa.string()),
+        ("price", pa.float64()),
+        ("amount", pa.float64()),
+        ("cost", pa.float64()),
+        ("fee", _TRADES_FEE),
+    ]
+)
+_TRADES_SCHEMA = _pandas_schema(
+    [
+        ("Timestamp", _TIMESTAMP),
+        ("symbol", _CATEGORY),
+        ("side", _CATEGORY),
+        ("price", pa.float64()),
+        ("amount", pa.float64()),
+        ("cost", pa.float64()),
+        ("fee_cost", pa.float64()),
+        ("fee_currency", _CATEGORY),
+        ("fee_rate", pa.float64()),
+        ("exchange", _CATEGORY),
+    ],
+    index="Timestamp",
+)
+_FUNDING_RAW_SCHEMA = pa.schema(
+    [("timestamp", pa.int64()), ("fundingRate", pa.float64())]
+)
+_FUNDING_SCHEMA = _pandas_schema(
+    [
+        ("Timestamp", _TIMESTAMP),
+        ("symbol", _CATEGORY),
+        ("fundingRate", pa.float64()),
+        ("exchange", _CATEGORY),
+    ],
+    index="Timestamp",
+)
+
+# Threads used to compress and write parquet files, off the event loop
+_WRITER_POOL = ThreadPoolExecutor(
+    max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="ccxt_download"
+)
+
+# Number of downloads to run at once
+_WORKERS = 256
+
+# Maximum number of consecutive periods fetched by a single download
+_SPAN_LENGTHS = {CANDLES: 7, TRADES: 1, FUNDING: 7}
+
+# Default number of rows per parquet row group
+_ROW_GROUP_SIZES = {CANDLES: 128 * 1024, TRADES: 256 * 1024, FUNDING: 16 * 1024}
+
+# Maximum number of candles returned by a single request, by exchange id,
+# for exchanges which don't describe the limit in their features
+_EXCHANGE_MAX_BARS = {
+    "binance": 1000,
+    "binanceusdm": 1500,
+    "binancecoinm": 1500,
+    "bybit": 1000,
+}
+_DEFAULT_MAX_BARS = 500
+
 
 def download(
     exchange: Union[CCXT_EXCHANGES, ccxt.Exchange],
@@ -30,6 +157,11 @@ def download(
     rate_limiter: Optional[AsyncLimiter] = None,
     verbose: Optional[bool] = True,
     options: Optional[dict[str, dict]] = None,
+    max_concurrency: Optional[int] = 64,
+    compression: str = "zstd",
+    compression_level: Optional[int] = 3,
+    row_group_size: Optional[int] = None,
+    precision: Optional[str] = "float64",
 ):
     """Download data.
 
@@ -67,6 +199,29 @@ def download(
 
     options : dict[str, dict], optional
         Extra options to pass to the download methods.
+
+    max_concurrency : int, optional
+        The maximum number of requests in flight to the exchange at
+        once. If None, only the connection pool bounds the number of
+        requests in flight. The default is 64.
+
+    compression : str, optional
+        The parquet compression codec. The default is 'zstd'.
+
+    compression_level : int, optional
+        The compression level, for codecs which support it. The
+        default is 3.
+
+    row_group_size : int, optional
+        The maximum number of rows per parquet row group. The default
+        depends on the data type.
+
+    precision : str, optional
+        The precision of the prices and trade amounts written to disk,
+        either 'float32' or 'float64'. Single precision halves the size
+        of the data, at the cost of keeping ~7 significant digits. Candle
+        volumes are always stored in double precision. The default is
+        'float64'.
     """
     # TODO - should probably check that the end date isn't today, or
     # else a partial file will be written and never filled.
@@ -76,31 +231,47 @@ def download(
         rate_limiter = AsyncLimiter(max_rate=100, time_period=30)
 
     if isinstance(start_date, str):
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        start_date = datetime.fromisoformat(start_date)
 
     if isinstance(end_date, str):
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        end_date = datetime.fromisoformat(end_date)
 
     # Enforce timezones
-    start_date = pytz.utc.localize(start_date)
-    end_date = pytz.utc.localize(end_date)
+    start_date = _as_utc(start_date)
+    end_date = _as_utc(end_date)
 
     # Prevent future end date
-    end_date = min(end_date, pytz.utc.localize(datetime.now()))
+    end_date = min(end_date, datetime.now(tz=timezone.utc))
 
-    asyncio.run(
-        download_async(
-            exchange=exchange,
-            data_types=data_types,
-            symbols=symbols,
-            start_dt=start_date,
-            end_dt=end_date,
-            rate_limiter=rate_limiter,
-            download_dir=download_dir,
-            verbose=verbose,
-            options=options,
+    # Run on uvloop's faster event loop, when it is installed
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(
+            download_async(
+                exchange=exchange,
+                data_types=data_types,
+                symbols=symbols,
+                start_dt=start_date,
+                end_dt=end_date,
+                rate_limiter=rate_limiter,
+                download_dir=download_dir,
+                verbose=verbose,
+                options=options,
+                max_concurrency=max_concurrency,
+                compression=compression,
+                compression_level=compression_level,
+                row_group_size=row_group_size,
+                precision=precision,
+            )
         )
-    )
+
+
+def _as_utc(dt: datetime) -> datetime:
+    """Returns a datetime in UTC. Naive datetimes are taken to be in UTC
+    already, and aware ones are converted."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
 
 
 async def download_async(
@@ -113,6 +284,11 @@ async def download_async(
     download_dir: str = DEFAULT_DOWNLOAD_DIR,
     verbose: Optional[bool] = True,
     options: Optional[dict[str, dict]] = None,
+    max_concurrency: Optional[int] = 64,
+    compression: str = "zstd",
+    compression_level: Optional[int] = 3,
+    row_group_size: Optional[int] = None,
+    precision: Optional[str] = "float64",
 ):
     """Async data download function.
 
@@ -149,63 +325,680 @@ async def download_async(
 
     options : dict[str, dict], optional
         Extra options to pass to the download methods.
+
+    max_concurrency : int, optional
+        The maximum number of requests in flight to the exchange at
+        once. If None, only the connection pool bounds the number of
+        requests in flight. The default is 64.
+
+    compression : str, optional
+        The parquet compression codec. The default is 'zstd'.
+
+    compression_level : int, optional
+        The compression level, for codecs which support it. The
+        default is 3.
+
+    row_group_size : int, optional
+        The maximum number of rows per parquet row group. The default
+        depends on the data type.
+
+    precision : str, optional
+        The precision of the prices and trade amounts written to disk,
+        either 'float32' or 'float64'. Single precision halves the size
+        of the data, at the cost of keeping ~7 significant digits. Candle
+        volumes are always stored in double precision. The default is
+        'float64'.
     """
+    # Check data types
+    unknown = [datatype for datatype in data_types if datatype not in _HELPERS]
+    if unknown:
+        raise ValueError(
+            f"Unknown data type(s) {unknown}, expected one of {list(_HELPERS)}."
+        )
+
     # Create exchange instance
+    session = None
     if isinstance(exchange, str):
-        exchange = getattr(ccxt, exchange)()
+        exchange_class = getattr(ccxt, exchange)
+
+        # Throttling is left to the rate limiter, and requests share a
+        # pooled session, which is closed here rather than by the exchange
+        session = _pooled_session(limit_per_host=max_concurrency or 0)
+        try:
+            exchange = exchange_class(
+                {
+                    "enableRateLimit": False,
+                    "aiohttp_trust_env": True,
+                    "session": session,
+                }
+            )
+        except Exception:
+            await session.close()
+            raise
     elif not isinstance(exchange, ccxt.Exchange):
         raise Exception(
             f"Exchange must be of type 'str' or 'ccxt.pro.Exchange',  not {type(exchange)}."
         )
-    await exchange.load_markets()
-
-    # Check download directory
-    if not os.path.exists(download_dir):
-        os.mkdir(download_dir)
-
-    # Check options
-    if options is None:
-        options = {}
-
-    # Collect tasks
-    tasks = []
-    for datatype in data_types:
-        for symbol in symbols:
-            method = globals().get(datatype)
-            kwargs = options.get(datatype, {})
-            tasks = await method(
-                exchange=exchange,
-                symbol=symbol,
-                start_dt=start_dt,
-                end_dt=end_dt,
-                rate_limiter=rate_limiter,
-                download_dir=download_dir,
-                verbose=verbose,
-                tasks=tasks,
-                **kwargs,
+    try:
+        # Every request the exchange sends takes a rate limiter token
+        with _rate_limited(exchange, rate_limiter):
+            # Check download directory
+            os.makedirs(download_dir, exist_ok=True)
+
+            if session is not None:
+                await _load_markets_cached(exchange, download_dir)
+            else:
+                # Exchanges passed in may be in sandbox mode, or have options
+                # which change their markets, so they don't use the snapshot
+                await exchange.load_markets()
+
+            # List the files already downloaded
+            existing = _list_downloaded(download_dir)
+
+            # Check options
+            if options is None:
+                options = {}
+
+            # Parquet write options
+            write_options = _parquet_options(
+                compression=compression,
+                compression_level=compression_level,
+                row_group_size=row_group_size,
+                precision=precision,
+            )
+
+            # Bound the number of requests in flight
+            semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+            # Plan the downloads, skipping data which already exists
+            exchange_name = exchange.name.lower()
+            plan = []
+            for datatype in data_types:
+                kwargs = options.get(datatype, {})
+                for symbol in symbols:
+                    jobs = _plan(
+                        exchange=exchange_name,
+                        data_type=datatype,
+                        symbol=symbol,
+                        start_dt=start_dt,
+                        end_dt=end_dt,
+                        download_dir=download_dir,
+                        existing=existing,
+                        timeframe=kwargs.get("timeframe", "1m"),
+                        span=_SPAN_LENGTHS[datatype],
+                    )
+                    plan += [(datatype, symbol, periods) for periods in jobs]
+
+            # Download with a fixed pool of workers, to bound the number of
+            # coroutines alive at once
+            async def download_job(job: tuple[DATATYPES, str, list]):
+                datatype, symbol, periods = job
+                await _HELPERS[datatype](
+                    exchange=exchange,
+                    symbol=symbol,
+                    periods=periods,
+                    verbose=verbose,
+                    semaphore=semaphore,
+                    write_options=write_options,
+                    exchange_name=exchange_name,
+                    **options.get(datatype, {}),
+                )
+
+            await _run_pool(plan, download_job, workers=_WORKERS)
+    finally:
+        # Close exchange connection
+        await exchange.close()
+        if session is not None:
+            await session.close()
+
+
+async def _run_pool(
+    jobs: Iterable,
+    handler: Callable[..., Coroutine],
+    workers: int,
+):
+    """Run a coroutine function on each job using a fixed pool of
+    workers, fed from a bounded queue. The first error raised by a
+    worker cancels the remaining jobs and is re-raised."""
+    queue = asyncio.Queue(maxsize=2 * workers)
+
+    async def feed():
+        for job in jobs:
+            await queue.put(job)
+        await queue.join()
+
+    async def work():
+        while True:
+            job = await queue.get()
+            try:
+                await handler(job)
+            finally:
+                queue.task_done()
+
+    tasks = [asyncio.create_task(feed())]
+    tasks += [asyncio.create_task(work()) for _ in range(workers)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # Raises the error of a failed worker
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _pooled_session(limit_per_host: int, limit: int = 256) -> aiohttp.ClientSession:
+    """Create a pooled HTTP session to pass to an exchange, shared by all
+    requests, which keeps connections alive and caps the number of
+    connections opened to a single host.
+
+    A session passed to ccxt replaces the one it would open itself, so
+    the SSL context and connector settings mirror those of
+    Exchange.open in ccxt 4.x, with ccxt's default options.
+    """
+    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    connector = aiohttp.TCPConnector(
+        ssl=ssl_context,
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=60,
+        enable_cleanup_closed=True,
+        family=socket.AF_UNSPEC,
+        happy_eyeballs_delay=0,
+    )
+    return aiohttp.ClientSession(connector=connector, trust_env=True)
+
+
+async def _load_markets_cached(
+    exchange: ccxt.Exchange,
+    download_dir: str,
+    ttl: timedelta = timedelta(hours=6),
+):
+    """Load the exchange markets, using a snapshot in the download
+    directory if it is younger than the ttl provided. The snapshot is
+    keyed by exchange id only, so it is only valid for exchanges created
+    with the default options."""
+    if exchange.markets:
+        # Markets already loaded
+        return
+
+    filename = os.path.join(download_dir, f".markets_{exchange.id}.json")
+    try:
+        age = datetime.now().timestamp() - os.path.getmtime(filename)
+        if age < ttl.total_seconds():
+            with open(filename) as f:
+                snapshot = json.load(f)
+            exchange.set_markets(snapshot["markets"], snapshot["currencies"])
+            logger.debug(f"Loaded {exchange.id} markets from {filename}.")
+            return
+    except (OSError, ValueError, KeyError) as e:
+        logger.debug(f"Could not load {exchange.id} markets from {filename}: {e}")
+
+    # Load markets from the exchange and save a snapshot
+    await exchange.load_markets(reload=True)
+    with open(filename, "w") as f:
+        json.dump(
+            {"markets": exchange.markets, "currencies": exchange.currencies},
+            f,
+            default=str,
+        )
+
+
+async def _retry(
+    coro_factory: Callable[[], Coroutine],
+    *,
+    retries: int = 6,
+    base: float = 0.5,
+):
+    """Await a coroutine, retrying with exponential backoff and jitter
+    when it fails with a transient (network or rate limit) error.
+
+    Parameters
+    ----------
+    coro_factory : Callable
+        A function returning a new coroutine for each attempt.
+
+    retries : int, optional
+        The number of times to retry before giving up. The default is 6.
+
+    base : float, optional
+        The base backoff period, in seconds. The default is 0.5.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await coro_factory()
+        except _TRANSIENT_ERRORS as e:
+            if attempt == retries:
+                raise
+
+            # Honor the exchange's Retry-After, if it gave one
+            match = _RETRY_AFTER.search(" ".join(str(a) for a in e.args))
+            if match:
+                # Capped, in case the value is in milliseconds or a timestamp
+                delay = min(30, float(match.group(1)))
+            else:
+                delay = min(30, base * 2**attempt) + random.random() * base
+
+            logger.debug(
+                f"Request failed ({type(e).__name__}), retrying in {delay:.1f}s."
             )
+            await asyncio.sleep(delay)
+
+
+async def _request(
+    method: Callable,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    **kwargs,
+):
+    """Call an exchange method within the concurrency limit, retrying on
+    transient errors."""
+
+    async def attempt():
+        async with semaphore or nullcontext():
+            return await method(**kwargs)
+
+    return await _retry(attempt)
+
+
+@contextmanager
+def _rate_limited(exchange: ccxt.Exchange, rate_limiter: AsyncLimiter):
+    """Make the exchange acquire a rate limiter token for every HTTP
+    request it sends, including those ccxt sends internally (eg. when
+    loading markets or paginating)."""
+    if "fetch" in vars(exchange):
+        # Already rate limited
+        yield
+        return
+
+    fetch = exchange.fetch
+
+    async def rate_limited_fetch(*args, **kwargs):
+        async with rate_limiter:
+            return await fetch(*args, **kwargs)
+
+    exchange.fetch = rate_limited_fetch
+    try:
+        yield
+    finally:
+        del exchange.fetch
+
+
+@lru_cache
+def _timeframe_ms(timeframe: str) -> int:
+    """Returns the length of a candle timeframe in milliseconds."""
+    try:
+        return int(timedelta_from_str(timeframe).total_seconds() * 1000)
+    except ValueError:
+        raise KeyError(f"Timeframe key '{timeframe}' not supported.")
+
+
+def _plan_periods(
+    start_dt: datetime,
+    end_dt: datetime,
+    td: Optional[timedelta] = None,
+) -> list[tuple[datetime, timedelta]]:
+    """Returns the start and length of each period to download between
+    two dates. Candles with timeframe td are downloaded in daily, monthly
+    or yearly periods depending on the timeframe, everything else daily."""
+    if td is None:
+        # Daily periods
+        td = timedelta(0)
+    bounds = _period_edges(start_dt, end_dt, td).to_pydatetime()
+    return [(start, end - start) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _plan(
+    exchange: str,
+    data_type: DATATYPES,
+    symbol: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    download_dir: str = DEFAULT_DOWNLOAD_DIR,
+    existing: Optional[set[str]] = None,
+    timeframe: Optional[str] = "1m",
+    span: Optional[int] = 1,
+) -> list[list[tuple[datetime, timedelta, str]]]:
+    """Plan the download of a symbol's data between two dates.
 
-    await asyncio.gather(*tasks)
+    Parameters
+    ----------
+    span : int, optional
+        The maximum number of consecutive periods to group into a
+        single download. The default is 1.
+
+    Returns
+    -------
+    list[list[tuple[datetime, timedelta, str]]]
+        Runs of consecutive periods which have not already been
+        downloaded, given by the start, length and filename of each
+        period.
+    """
+    if data_type == CANDLES:
+        td = timedelta(milliseconds=_timeframe_ms(timeframe))
+        data_type_id = timeframe
+        description = f"{timeframe} candles"
+    else:
+        td = None
+        data_type_id = None
+        description = f"{data_type} data"
+    jobs = []
+    periods = []
+    now = datetime.now(timezone.utc)
+    for period_start, window_length in _plan_periods(start_dt, end_dt, td):
+        filename = filename_builder(
+            exchange=exchange,
+            start_dt=period_start,
+            window_length=window_length,
+            download_dir=download_dir,
+            symbol=symbol,
+            data_type=data_type,
+            data_type_id=data_type_id,
+            now=now,
+        )
+        if _check_to_proceed(filename, existing):
+            periods.append((period_start, window_length, filename))
+            if len(periods) < span:
+                continue
+        else:
+            # Data already downloaded, skip
+            logger.info(
+                f"{description} for {symbol} on {exchange} starting {period_start} already exist."
+            )
+        if periods:
+            jobs.append(periods)
+            periods = []
+    if periods:
+        jobs.append(periods)
+    return jobs
+
+
+def _list_downloaded(directory: str) -> set[str]:
+    """Returns the names of the files already downloaded to a directory,
+    cleaning up any partial files left behind by an interrupted
+    download."""
+    existing = set()
+    for entry in os.scandir(directory):
+        if not entry.is_file():
+            continue
+        if not entry.name.endswith(".tmp"):
+            existing.add(entry.name)
+            continue
+        if _is_stale(entry.path):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # Already cleaned up by another download
+                continue
+            logger.debug(f"Removing partially downloaded file: {entry.path}.")
+    return existing
+
+
+def _check_to_proceed(filename: str, existing: Optional[set[str]] = None):
+    """Check whether a file needs to be downloaded. Any incomplete
+    version of it is left in place until it is replaced.
 
-    # Close exchange connection
-    await exchange.close()
+    Parameters
+    ----------
+    filename : str
+        The path of the file to download.
 
+    existing : set[str], optional
+        The names of the files in the download directory. If not
+        provided, the filesystem is queried directly.
+    """
 
-def _check_to_proceed(filename: str):
-    proceed = True
-    if os.path.exists(filename) and "incomplete" not in filename:
-        # Data already downloaded, skip
-        proceed = False
+    def exists(path: str):
+        if existing is None:
+            return os.path.exists(path)
+        return os.path.basename(path) in existing
+
+    # Incomplete data is always updated
+    # TODO - could do partial download using incomplete dataset for efficiency
+    return "incomplete" in filename or not exists(filename)
+
+
+def _parquet_options(
+    compression: str,
+    compression_level: Optional[int] = None,
+    row_group_size: Optional[int] = None,
+    precision: Optional[str] = "float64",
+) -> dict:
+    """Returns the keyword arguments used to write parquet files."""
+    if precision not in ("float32", "float64"):
+        raise ValueError(
+            f"Precision must be 'float32' or 'float64', not '{precision}'."
+        )
+    options = {"compression": compression, "precision": precision}
+    try:
+        if compression_level is not None and pa.Codec.supports_compression_level(
+            compression
+        ):
+            options["compression_level"] = compression_level
+    except ValueError:
+        # Not an arrow codec (eg. 'none')
+        pass
+    if row_group_size is not None:
+        options["row_group_size"] = row_group_size
+    return options
+
+
+def _tmp_filename(filename: str) -> str:
+    """Returns the temporary file a file is written to. It is hidden,
+    so that it isn't picked up when reading a dataset, and named after
+    the process writing it, so that concurrent downloads to the same
+    directory don't collide."""
+    head, tail = os.path.split(filename)
+    return os.path.join(head, f".{tail}.{os.getpid()}.tmp")
+
+
+def _is_stale(path: str) -> bool:
+    """Check whether a temporary file was left behind by a download
+    which is no longer running. That is, one written by a process which
+    has exited, or which hasn't been modified for a day."""
+    match = _TMP_PID.search(path)
+    if match is not None:
+        pid = int(match.group(1))
+        if pid == os.getpid():
+            # Written by a download running in this process
+            return False
+        if os.name == "posix":
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                # Running, as another user
+                pass
+    try:
+        return time.time() - os.path.getmtime(path) > _STALE_TMP_AGE
+    except FileNotFoundError:
+        return False
 
-    # Check for incomplete dataset on this day
-    _incomplete_filename = "_incomplete.parquet".join(filename.split(".parquet"))
-    if os.path.exists(_incomplete_filename):
-        # Remove incomplete file (to be replaced with complete data now)
-        # TODO - could do partial download using incomplete dataset for efficiency
-        os.remove(_incomplete_filename)
-        logger.debug(f"Removing previously incomplete data: {filename}.")
 
-    return proceed
+def _remove_incomplete(filename: str):
+    """Remove the incomplete version of a file, now that it has been
+    replaced with complete data."""
+    if "incomplete" in filename:
+        return
+    incomplete_filename = "_incomplete.parquet".join(filename.split(".parquet"))
+    if os.path.exists(incomplete_filename):
+        os.remove(incomplete_filename)
+        logger.debug(f"Removing previously incomplete data: {incomplete_filename}.")
+
+
+class _RowGroupWriter:
+    """Streams record batches to a parquet file, buffering them so that
+    each row group holds at least `row_group_size` rows. The data is
+    written to a temporary file, which is only created once the first
+    non-empty batch is written, and moved into place on close. Used as
+    an async context manager, the file is discarded if an error is
+    raised.
+
+    Row groups are compressed and written from a worker thread, so that
+    writing doesn't block the event loop."""
+
+    def __init__(
+        self,
+        filename: str,
+        schema: pa.Schema,
+        row_group_size: int = _ROW_GROUP_SIZES[CANDLES],
+        compression: str = "zstd",
+        compression_level: Optional[int] = None,
+        precision: Optional[str] = "float64",
+    ):
+        self.filename = filename
+        self.schema = _with_precision(schema, precision)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.rows = 0
+        self._tmp_filename = _tmp_filename(filename)
+        self._buffer = []
+        self._buffered_rows = 0
+        self._writer = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close(discard=exc_type is not None)
+
+    async def write(self, batch: pa.RecordBatch):
+        """Buffer a batch, flushing a row group when the buffer is full."""
+        if batch.num_rows == 0:
+            return
+        self._buffer.append(batch)
+        self._buffered_rows += batch.num_rows
+        self.rows += batch.num_rows
+        if self._buffered_rows >= self.row_group_size:
+            await _in_thread(self._flush)
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            self._writer = pq.ParquetWriter(
+                self._tmp_filename,
+                self.schema,
+                compression=self.compression,
+                compression_level=self.compression_level,
+            )
+        table = pa.Table.from_batches(self._buffer).cast(self.schema)
+        self._writer.write_table(table)
+        self._buffer = []
+        self._buffered_rows = 0
+
+    async def close(self, discard: bool = False):
+        """Flush any buffered rows and move the file into place, or
+        discard it."""
+        await _in_thread(self._close, discard)
+
+    def _close(self, discard: bool = False):
+        try:
+            if not discard:
+                self._flush()
+        except BaseException:
+            discard = True
+            raise
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                if discard:
+                    os.remove(self._tmp_filename)
+                else:
+                    os.replace(self._tmp_filename, self.filename)
+                    _remove_incomplete(self.filename)
+
+
+async def _in_thread(func: Callable, *args, **kwargs):
+    """Run a blocking function in the writer thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_WRITER_POOL, partial(func, *args, **kwargs))
+
+
+class _PeriodWriter:
+    """Splits a stream of time-sorted record batches across the files of
+    consecutive download periods, dropping rows outside of them. Each
+    file is moved into place as soon as the stream has moved past its
+    period, so an error only discards the files still being written."""
+
+    def __init__(
+        self,
+        periods: list[tuple[datetime, timedelta, str]],
+        schema: pa.Schema,
+        **options,
+    ):
+        self.periods = periods
+        self._bounds = _period_bounds(periods)
+        self._writers = [
+            _RowGroupWriter(filename, schema, **options) for _, _, filename in periods
+        ]
+        self._open = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Close every writer, even if one of them fails to close
+        error = None
+        for writer in self._writers[self._open :]:
+            try:
+                await writer.close(discard=exc_type is not None)
+            except Exception as e:
+                error = error or e
+        self._open = len(self._writers)
+        if error is not None:
+            raise error
+
+    async def write(self, batch: pa.RecordBatch):
+        """Write the rows of a batch to the files of their periods."""
+        ts = batch.column(0).cast(pa.int64()).to_numpy()
+        cuts = np.searchsorted(ts, self._bounds)
+        for i in range(self._open, len(self._writers)):
+            await self._writers[i].write(batch.slice(cuts[i], cuts[i + 1] - cuts[i]))
+
+        # Finish the periods which the stream has moved past
+        while self._open < len(self._writers) - 1 and cuts[self._open + 1] < len(ts):
+            await self._writers[self._open].close()
+            self._open += 1
+
+    def rows(self) -> list[tuple[datetime, int]]:
+        """Returns the number of rows written for each period."""
+        return [(p[0], w.rows) for p, w in zip(self.periods, self._writers)]
+
+
+def _period_bounds(periods: list[tuple[datetime, timedelta, str]]) -> list[int]:
+    """Returns the millisecond timestamps bounding consecutive periods."""
+    bounds = [int(start.timestamp() * 1000) for start, _, _ in periods]
+    start, window_length, _ = periods[-1]
+    return bounds + [int((start + window_length).timestamp() * 1000)]
+
+
+def _span_bounds(periods: list[tuple[datetime, timedelta, str]]) -> tuple[int, int]:
+    """Returns the millisecond timestamps at the start and end of a run
+    of consecutive periods."""
+    bounds = _period_bounds(periods)
+    return bounds[0], bounds[-1]
+
+
+def _with_precision(schema: pa.Schema, precision: str) -> pa.Schema:
+    """Returns the schema with its price and volume columns stored at
+    the precision provided."""
+    if precision != "float32":
+        return schema
+    for i, field in enumerate(schema):
+        if field.name in FLOAT32_COLUMNS:
+            schema = schema.set(i, field.with_type(pa.float32()))
+    return schema
+
+
+def _repeat(value: str, n: int) -> pa.DictionaryArray:
+    """Returns a dictionary-encoded array repeating a single value."""
+    indices = pa.array(np.zeros(n, dtype=np.int32))
+    return pa.DictionaryArray.from_arrays(indices, pa.array([value]))
 
 
 async def candles(
@@ -217,8 +1010,10 @@ async def candles(
     timeframe: Optional[str] = "1m",
     download_dir: str = DEFAULT_DOWNLOAD_DIR,
     verbose: Optional[bool] = True,
-    tasks: Optional[list[Coroutine]] = None,
-) -> pd.DataFrame:
+    semaphore: Optional[asyncio.Semaphore] = None,
+    existing: Optional[set[str]] = None,
+    write_options: Optional[dict] = None,
+):
     """Download candle (OHLCV) data for a specified date range.
 
     Parameters
@@ -256,127 +1051,173 @@ async def candles(
     verbose : bool, optional
         Be verbose. The default is True.
 
-    tasks : list[coroutine], optional
-        A list of coroutine tasks to append to. Used internally.
+    semaphore : asyncio.Semaphore, optional
+        A semaphore bounding the number of requests in flight.
+
+    existing : set[str], optional
+        The names of the files already in the download directory.
+
+    write_options : dict, optional
+        Keyword arguments for the parquet writer (compression,
+        compression_level, row_group_size and precision).
+
     """
-    # Determine timestep based on timeframe
-    td = timedelta_from_str(timeframe)
-    timestep = _timestep_from_timedelta(td)
-
-    # Iterate through date range
-    current_dt = _period_start(td, start_dt)
-    while current_dt < end_dt:
-        # Download data for this chunk
-        coro = _candle_helper(
-            exchange=exchange,
-            symbol=symbol,
-            start_dt=current_dt,
-            window_length=timestep,
-            rate_limiter=rate_limiter,
-            timeframe=timeframe,
-            download_dir=download_dir,
-            verbose=verbose,
+    exchange_name = exchange.name.lower()
+    jobs = _plan(
+        exchange=exchange_name,
+        data_type=CANDLES,
+        symbol=symbol,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        download_dir=download_dir,
+        existing=existing,
+        timeframe=timeframe,
+        span=_SPAN_LENGTHS[CANDLES],
+    )
+    with _rate_limited(exchange, rate_limiter):
+        await asyncio.gather(
+            *[
+                _candle_helper(
+                    exchange=exchange,
+                    symbol=symbol,
+                    periods=periods,
+                    timeframe=timeframe,
+                    verbose=verbose,
+                    semaphore=semaphore,
+                    write_options=write_options,
+                    exchange_name=exchange_name,
+                )
+                for periods in jobs
+            ]
         )
-        if tasks is not None:
-            # Append to tasks list
-            tasks.append(coro)
-        else:
-            # Await and return immediately
-            return await coro
 
-        # Walk forwards in time
-        current_dt = _period_start(td, current_dt + timestep)
 
-    if tasks is not None:
-        return tasks
+def _max_bars(exchange: ccxt.Exchange, symbol: str) -> int:
+    """Returns the maximum number of candles the exchange will return
+    for a symbol in a single request. A limit set in the exchange options
+    takes precedence over the limit in the exchange's features, which
+    depends on the market type (and for derivatives, on whether the
+    market is linear or inverse)."""
+    limit = exchange.options.get("fetchOHLCV", {}).get("limit")
+    if limit is None:
+        market = (exchange.markets or {}).get(symbol)
+        features = (exchange.features or {}).get(market["type"]) if market else None
+        if features and "fetchOHLCV" not in features:
+            subtype = "linear" if market.get("linear") else "inverse"
+            features = features.get(subtype)
+        limit = ((features or {}).get("fetchOHLCV") or {}).get("limit")
+    if limit is None:
+        limit = _EXCHANGE_MAX_BARS.get(exchange.id, _DEFAULT_MAX_BARS)
+    return limit
 
 
 async def _candle_helper(
     exchange: ccxt.Exchange,
     symbol: str,
-    start_dt: datetime,
-    window_length: timedelta,
-    rate_limiter: AsyncLimiter,
+    periods: list[tuple[datetime, timedelta, str]],
     timeframe: Optional[str] = "1m",
-    download_dir: str = DEFAULT_DOWNLOAD_DIR,
     verbose: Optional[bool] = True,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    write_options: Optional[dict] = None,
+    exchange_name: Optional[str] = None,
 ) -> pd.DataFrame:
-    # Build filename using start date and window length
-    filename = filename_builder(
-        exchange=exchange.name.lower(),
-        start_dt=start_dt,
-        window_length=window_length,
-        download_dir=download_dir,
-        symbol=symbol,
-        data_type=CANDLES,
-        data_type_id=timeframe,
-    )
-
-    # Check to proceed
-    proceed = _check_to_proceed(filename)
-    if not proceed:
-        # Data already downloaded, skip
-        logger.info(
-            f"{timeframe} candles for {symbol} on {exchange.name} starting {start_dt} already exist."
-        )
-        return
-
     logger.debug(
-        f"Fetching {timeframe} candles for on {exchange.name} {symbol} starting {start_dt}."
+        f"Fetching {timeframe} candles for on {exchange.name} {symbol} starting {periods[0][0]}."
     )
 
-    # Fetch OHLCV data
-    start_ts = int(start_dt.timestamp() * 1000)
-    try:
-        timeframe_ms = timedelta_from_str(timeframe).total_seconds() * 1000
-    except ValueError:
-        raise KeyError(f"Timeframe key '{timeframe}' not supported.")
-    end_ts = int((start_dt + window_length).timestamp() * 1000)
-    ohlcv_data = []
-    current_ts = start_ts
-    while current_ts < end_ts:
-        limit = int((end_ts - current_ts) / timeframe_ms) + 1
-        async with rate_limiter:
-            data = await exchange.fetch_ohlcv(
+    # Fetch OHLCV data for all periods at once
+    start_ts, end_ts = _span_bounds(periods)
+    timeframe_ms = _timeframe_ms(timeframe)
+
+    # Split the window into pages of as many candles as the exchange will
+    # return at once, which are fetched concurrently
+    max_bars = _max_bars(exchange, symbol)
+    page_ms = max_bars * timeframe_ms
+    pages = await asyncio.gather(
+        *[
+            _fetch_candles(
+                exchange=exchange,
                 symbol=symbol,
                 timeframe=timeframe,
-                since=current_ts,
-                limit=limit,
+                timeframe_ms=timeframe_ms,
+                start_ts=page_start,
+                end_ts=min(page_start + page_ms, end_ts),
+                semaphore=semaphore,
             )
-        if len(data) < 1:
-            break
-        ohlcv_data += data
-        current_ts = data[-1][0] + 1
-
-    # Convert the data into a DataFrame
-    columns = ["Timestamp", "Open", "High", "Low", "Close", "Volume"]
-    df = pd.DataFrame(ohlcv_data, columns=columns)
-
-    # Check actual date range of data
-    df = df.loc[(start_ts <= df["Timestamp"]) & (df["Timestamp"] < end_ts)]
-    if len(df) == 0:
-        logger.info(
-            f"No {timeframe} candles for {symbol} on {exchange} found on {start_dt.strftime('%Y-%m-%d')}."
-        )
-        return
-
-    # Convert the timestamp to a readable format
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], unit="ms")
+            for page_start in range(start_ts, end_ts, page_ms)
+        ]
+    )
 
-    # Set the Timestamp column as the DataFrame's index
-    df.set_index("Timestamp", inplace=True)
+    # Stream the pages to file, in order
+    exchange_name = exchange_name or exchange.name.lower()
+    options = {"row_group_size": _ROW_GROUP_SIZES[CANDLES], **(write_options or {})}
+    async with _PeriodWriter(periods, _CANDLES_SCHEMA, **options) as writer:
+        for ohlcv in (chunk for page in pages for chunk in page):
+            # Transpose the chunk so that each column is contiguous, and
+            # can be handed to arrow without a copy
+            columns = np.ascontiguousarray(ohlcv.T)
+            n = len(ohlcv)
+            batch = pa.record_batch(
+                [
+                    pa.array(columns[0].astype(np.int64), type=_TIMESTAMP),
+                    *[pa.array(columns[i]) for i in range(1, 6)],
+                    _repeat(exchange_name, n),
+                    _repeat(symbol, n),
+                ],
+                schema=_CANDLES_SCHEMA,
+            )
+            await writer.write(batch)
 
-    # Add meta info
-    df["exchange"] = exchange.name.lower()
-    df["symbol"] = symbol
+    for start_dt, rows in writer.rows():
+        if rows == 0:
+            logger.info(
+                f"No {timeframe} candles for {symbol} on {exchange} found on {start_dt.strftime('%Y-%m-%d')}."
+            )
+        elif verbose:
+            print(
+                f"Finished downloading {timeframe} candles for {symbol} on {exchange} starting {start_dt.strftime('%Y-%m-%d')}."
+            )
 
-    # Save
-    df.to_parquet(path=filename)
 
-    if verbose:
-        print(
-            f"Finished downloading {timeframe} candles for {symbol} on {exchange} starting {start_dt.strftime('%Y-%m-%d')}."
+async def _fetch_candles(
+    exchange: ccxt.Exchange,
+    symbol: str,
+    timeframe: str,
+    timeframe_ms: int,
+    start_ts: int,
+    end_ts: int,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> list[np.ndarray]:
+    """Fetch the candles with start_ts <= timestamp < end_ts, paging
+    through them if the exchange returns fewer than requested.
+
+    Returns
+    -------
+    list[np.ndarray]
+        The OHLCV chunks received, as float arrays.
+    """
+    chunks = []
+    current_ts = start_ts
+    while current_ts < end_ts:
+        limit = -(-(end_ts - current_ts) // timeframe_ms)
+        data = await _request(
+            exchange.fetch_ohlcv,
+            semaphore=semaphore,
+            symbol=symbol,
+            timeframe=timeframe,
+            since=current_ts,
+            limit=limit,
         )
+        if len(data) < 1:
+            break
+        current_ts = data[-1][0] + timeframe_ms
+
+        # Copy the chunk into a float array, rather than boxing it
+        # column by column, and trim it to the page
+        ohlcv = np.asarray(data, dtype=np.float64)
+        lo, hi = np.searchsorted(ohlcv[:, 0], [start_ts, end_ts])
+        chunks.append(ohlcv[lo:hi])
+    return chunks
 
 
 async def trades(
@@ -387,8 +1228,10 @@ async def trades(
     rate_limiter: AsyncLimiter,
     download_dir: str = DEFAULT_DOWNLOAD_DIR,
     verbose: Optional[bool] = True,
-    tasks: Optional[list[Coroutine]] = None,
-) -> pd.DataFrame:
+    semaphore: Optional[asyncio.Semaphore] = None,
+    existing: Optional[set[str]] = None,
+    write_options: Optional[dict] = None,
+):
     """Download trade data.
 
     Parameters
@@ -419,109 +1262,106 @@ async def trades(
     verbose : bool, optional
         Be verbose. The default is True.
 
-    tasks : list[coroutine], optional
-        A list of coroutine tasks to append to. Used internally.
-    """
-    # Iterate through date range
-    current_dt = start_dt
-    while current_dt < end_dt:
-        # Download data for this chunk
-        coro = _trades_helper(
-            exchange=exchange,
-            symbol=symbol,
-            start_dt=current_dt,
-            rate_limiter=rate_limiter,
-            download_dir=download_dir,
-            verbose=verbose,
-        )
-        if tasks is not None:
-            # Append to tasks list
-            tasks.append(coro)
-        else:
-            # Await and return immediately
-            return await coro
+    semaphore : asyncio.Semaphore, optional
+        A semaphore bounding the number of requests in flight.
+
+    existing : set[str], optional
+        The names of the files already in the download directory.
 
-        # Walk forwards in time
-        current_dt = current_dt + timedelta(days=1)
+    write_options : dict, optional
+        Keyword arguments for the parquet writer (compression,
+        compression_level, row_group_size and precision).
 
-    if tasks is not None:
-        return tasks
+    """
+    exchange_name = exchange.name.lower()
+    jobs = _plan(
+        exchange=exchange_name,
+        data_type=TRADES,
+        symbol=symbol,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        download_dir=download_dir,
+        existing=existing,
+        span=_SPAN_LENGTHS[TRADES],
+    )
+    with _rate_limited(exchange, rate_limiter):
+        await asyncio.gather(
+            *[
+                _trades_helper(
+                    exchange=exchange,
+                    symbol=symbol,
+                    periods=periods,
+                    verbose=verbose,
+                    semaphore=semaphore,
+                    write_options=write_options,
+                    exchange_name=exchange_name,
+                )
+                for periods in jobs
+            ]
+        )
 
 
 async def _trades_helper(
     exchange: ccxt.Exchange,
     symbol: str,
-    start_dt: datetime,
-    rate_limiter: AsyncLimiter,
-    download_dir: str = DEFAULT_DOWNLOAD_DIR,
+    periods: list[tuple[datetime, timedelta, str]],
     verbose: Optional[bool] = True,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    write_options: Optional[dict] = None,
+    exchange_name: Optional[str] = None,
 ) -> pd.DataFrame:
-    filename = filename_builder(
-        exchange=exchange.name.lower(),
-        start_dt=start_dt,
-        download_dir=download_dir,
-        symbol=symbol,
-        data_type=TRADES,
-    )
-
-    # Check to proceed
-    proceed = _check_to_proceed(filename)
-    if not proceed:
-        # Data already downloaded, skip
-        logger.info(
-            f"Trade data for {symbol} on {exchange.name} starting {start_dt} already exist."
-        )
-        return
-
     logger.debug(
-        f"Fetching trade data for {symbol} on {exchange.name} starting {start_dt}."
+        f"Fetching trade data for {symbol} on {exchange.name} starting {periods[0][0]}."
     )
 
     # Fetch trades
-    start_ts = int(start_dt.timestamp() * 1000)
-    end_ts = int((start_dt + timedelta(days=1)).timestamp() * 1000)
-    trade_data = []
-    current_ts = start_ts
-    while current_ts < end_ts:
-        async with rate_limiter:
-            data = await exchange.fetch_trades(
+    start_ts, end_ts = _span_bounds(periods)
+    exchange_name = exchange_name or exchange.name.lower()
+    options = {"row_group_size": _ROW_GROUP_SIZES[TRADES], **(write_options or {})}
+    async with _PeriodWriter(periods, _TRADES_SCHEMA, **options) as writer:
+        current_ts = start_ts
+        while current_ts < end_ts:
+            data = await _request(
+                exchange.fetch_trades,
+                semaphore=semaphore,
                 symbol=symbol,
                 since=current_ts,
                 limit=1000,
             )
-        if len(data) < 1:
-            break
-        trade_data += data
-        current_ts = data[-1]["timestamp"] + 1
-
-    # Convert the data into a DataFrame
-    df = pd.DataFrame(
-        trade_data,
-        columns=["timestamp", "symbol", "side", "price", "amount", "cost", "fee"],
-    )
-
-    # Check actual date range of data
-    df = df.loc[(start_ts <= df["timestamp"]) & (df["timestamp"] < end_ts)]
-    if len(df) == 0:
-        logger.info(
-            f"No trades for {symbol} on {exchange} found on {start_dt.strftime('%Y-%m-%d')}."
-        )
-        return
-
-    df["Timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("Timestamp", inplace=True)
-
-    # Add meta info and clean up
-    df["exchange"] = exchange.name.lower()
-    df.drop("timestamp", inplace=True, axis=1)
-
-    # Save
-    df.to_parquet(filename)
+            if len(data) < 1:
+                break
+            current_ts = data[-1]["timestamp"] + 1
+
+            # Convert the chunk into a record batch and stream it to file
+            batch = pa.RecordBatch.from_pylist(data, schema=_TRADES_RAW_SCHEMA)
+            # Flatten the fee into scalar columns
+            fee_cost, fee_currency, fee_rate = batch["fee"].flatten()
+            batch = pa.record_batch(
+                [
+                    batch["timestamp"].cast(_TIMESTAMP),
+                    batch["symbol"].dictionary_encode(),
+                    batch["side"].dictionary_encode(),
+                    batch["price"],
+                    batch["amount"],
+                    batch["cost"],
+                    fee_cost,
+                    fee_currency.dictionary_encode(),
+                    fee_rate,
+                    _repeat(exchange_name, batch.num_rows),
+                ],
+                schema=_TRADES_SCHEMA,
+            )
+            await writer.write(batch)
 
-    if verbose:
-        print(
-            f"Finished downloading trades for {symbol} on {exchange} on {start_dt.strftime('%Y-%m-%d')}."
-        )
+    for start_dt, rows in writer.rows():
+        if rows == 0:
+            logger.info(
+                f"No trades for {symbol} on {exchange} found on {start_dt.strftime('%Y-%m-%d')}."
+            )
+        elif verbose:
+            print(
+                f"Finished downloading trades for {symbol} on {exchange} on {start_dt.strftime('%Y-%m-%d')}."
+            )
 
 
 async def funding(
@@ -532,8 +1372,10 @@ async def funding(
     rate_limiter: AsyncLimiter,
     download_dir: str = DEFAULT_DOWNLOAD_DIR,
     verbose: Optional[bool] = True,
-    tasks: Optional[list[Coroutine]] = None,
-) -> pd.DataFrame:
+    semaphore: Optional[asyncio.Semaphore] = None,
+    existing: Optional[set[str]] = None,
+    write_options: Optional[dict] = None,
+):
     """Download funding rate data.
 
     Parameters
@@ -564,109 +1406,104 @@ async def funding(
     verbose : bool, optional
         Be verbose. The default is True.
 
-    tasks : list[coroutine], optional
-        A list of coroutine tasks to append to. Used internally.
-    """
-    # TODO - download over larger date ranges - see candles function for reference
-    # Iterate through date range
-    current_dt = start_dt
-    while current_dt < end_dt:
-        # Download data for this chunk
-        coro = _funding_helper(
-            exchange=exchange,
-            symbol=symbol,
-            start_dt=current_dt,
-            rate_limiter=rate_limiter,
-            download_dir=download_dir,
-            verbose=verbose,
-        )
-        if tasks is not None:
-            # Append to tasks list
-            tasks.append(coro)
-        else:
-            # Await and return immediately
-            return await coro
+    semaphore : asyncio.Semaphore, optional
+        A semaphore bounding the number of requests in flight.
 
-        # Walk forwards in time
-        current_dt = current_dt + timedelta(days=1)
+    existing : set[str], optional
+        The names of the files already in the download directory.
 
-    if tasks is not None:
-        return tasks
+    write_options : dict, optional
+        Keyword arguments for the parquet writer (compression,
+        compression_level, row_group_size and precision).
+
+    """
+    exchange_name = exchange.name.lower()
+    jobs = _plan(
+        exchange=exchange_name,
+        data_type=FUNDING,
+        symbol=symbol,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        download_dir=download_dir,
+        existing=existing,
+        span=_SPAN_LENGTHS[FUNDING],
+    )
+    with _rate_limited(exchange, rate_limiter):
+        await asyncio.gather(
+            *[
+                _funding_helper(
+                    exchange=exchange,
+                    symbol=symbol,
+                    periods=periods,
+                    verbose=verbose,
+                    semaphore=semaphore,
+                    write_options=write_options,
+                    exchange_name=exchange_name,
+                )
+                for periods in jobs
+            ]
+        )
 
 
 async def _funding_helper(
     exchange: ccxt.Exchange,
     symbol: str,
-    start_dt: datetime,
-    rate_limiter: AsyncLimiter,
-    download_dir: str = DEFAULT_DOWNLOAD_DIR,
+    periods: list[tuple[datetime, timedelta, str]],
     verbose: Optional[bool] = True,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    write_options: Optional[dict] = None,
+    exchange_name: Optional[str] = None,
 ) -> pd.DataFrame:
-    filename = filename_builder(
-        exchange=exchange.name.lower(),
-        start_dt=start_dt,
-        download_dir=download_dir,
-        symbol=symbol,
-        data_type=FUNDING,
-    )
-
-    # Check to proceed
-    proceed = _check_to_proceed(filename)
-    if not proceed:
-        # Data already downloaded, skip
-        logger.info(
-            f"Funding rate data for {symbol} on {exchange.name} starting {start_dt} already exist."
-        )
-        return
-
     logger.debug(
-        f"Fetching funding rate data for {symbol} on {exchange.name} starting {start_dt}."
+        f"Fetching funding rate data for {symbol} on {exchange.name} starting {periods[0][0]}."
     )
 
-    # Fetch trades
-    start_ts = int(start_dt.timestamp() * 1000)
-    end_ts = int((start_dt + timedelta(days=1)).timestamp() * 1000)
-    fr_data = []
-    current_ts = start_ts
-    while current_ts < end_ts:
-        async with rate_limiter:
-            data = await exchange.fetch_funding_rate_history(
+    # Fetch funding rates
+    start_ts, end_ts = _span_bounds(periods)
+    exchange_name = exchange_name or exchange.name.lower()
+    options = {"row_group_size": _ROW_GROUP_SIZES[FUNDING], **(write_options or {})}
+    async with _PeriodWriter(periods, _FUNDING_SCHEMA, **options) as writer:
+        current_ts = start_ts
+        while current_ts < end_ts:
+            data = await _request(
+                exchange.fetch_funding_rate_history,
+                semaphore=semaphore,
                 symbol=symbol,
                 since=current_ts,
                 # limit=6,
             )
-        if len(data) < 1:
-            break
-        fr_data += data
-        current_ts = data[-1]["timestamp"] + 1
-
-    # Convert the data into a DataFrame
-    df = pd.DataFrame(
-        fr_data,
-        columns=["timestamp", "symbol", "fundingRate"],
-    )
-
-    # Check actual date range of data
-    df = df.loc[(start_ts <= df["timestamp"]) & (df["timestamp"] < end_ts)]
-    df.loc[(start_ts < df["timestamp"])]
-    df.loc[(df["timestamp"] < end_ts)]
-    if len(df) == 0:
-        logger.info(
-            f"No funding rate data for {symbol} on {exchange} found on {start_dt.strftime('%Y-%m-%d')}."
-        )
-        return
-
-    df["Timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("Timestamp", inplace=True)
+            if len(data) < 1:
+                break
+            current_ts = data[-1]["timestamp"] + 1
+
+            # Convert the chunk into a record batch and stream it to file
+            batch = pa.RecordBatch.from_pylist(data, schema=_FUNDING_RAW_SCHEMA)
+            n = batch.num_rows
+            batch = pa.record_batch(
+                [
+                    batch["timestamp"].cast(_TIMESTAMP),
+                    _repeat(symbol, n),
+                    batch["fundingRate"],
+                    _repeat(exchange_name, n),
+                ],
+                schema=_FUNDING_SCHEMA,
+            )
+            await writer.write(batch)
 
-    # Add meta info and clean up
-    df["exchange"] = exchange.name.lower()
-    df.drop("timestamp", inplace=True, axis=1)
+    for start_dt, rows in writer.rows():
+        if rows == 0:
+            logger.info(
+                f"No funding rate data for {symbol} on {exchange} found on {start_dt.strftime('%Y-%m-%d')}."
+            )
+        elif verbose:
+            print(
+                f"Finished downloading funding rate data for {symbol} on {exchange} on {start_dt.strftime('%Y-%m-%d')}."
+            )
 
-    # Save
-    df.to_parquet(filename)
 
-    if verbose:
-        print(
-            f"Finished downloading funding rate data for {symbol} on {exchange} on {start_dt.strftime('%Y-%m-%d')}."
-        )
+# Download helper for each data type
+_HELPERS: dict[DATATYPES, Callable[..., Coroutine]] = {
+    CANDLES: _candle_helper,
+    TRADES: _trades_helper,
+    FUNDING: _funding_helper,
+}
@@ -1,29 +1,57 @@
 import os
-import pytz
+import re
 import ccxt
-import glob
+import fnmatch
+import time
 import logging
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from functools import lru_cache
+from operator import itemgetter
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union
-from datetime import datetime, timedelta
-from ccxt_download.constants import DEFAULT_DOWNLOAD_DIR, STR_CONVERSIONS, CANDLES
+from datetime import datetime, timedelta, timezone
+from ccxt_download.constants import (
+    DEFAULT_DOWNLOAD_DIR,
+    STR_CONVERSIONS,
+    CANDLES,
+    FLOAT32_COLUMNS,
+)
 
 
 STRFMT = "%Y-%m-%d"
 logger = logging.getLogger(__name__)
 
+# Timeframe strings, and the timedelta argument of each unit
+_TIMEFRAME = re.compile(r"^(\d+)([smhd])$")
+_TIMEFRAME_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+# Listings of download directories, with their modification times, kept
+# for the most recently listed directories
+_dir_cache: OrderedDict[str, tuple[int, list[str]]] = OrderedDict()
+_DIR_CACHE_SIZE = 32
+
+# Listings taken this soon after the directory was modified aren't cached,
+# as some filesystems (eg. FAT, or NFS attribute caching) don't update the
+# modification time again for a change made within the same interval
+_MTIME_RESOLUTION_NS = 2_000_000_000
+
+
+# Translation table of format_str, and the inverse conversions
+_FORMAT_TABLE = str.maketrans(STR_CONVERSIONS)
+_UNFORMAT_CONVERSIONS = {v: k for k, v in STR_CONVERSIONS.items()}
+
 
 def format_str(s: str):
     """Format a string so that it can be used as a filename."""
-    for c, sub in STR_CONVERSIONS.items():
-        s = s.replace(c, sub)
-    return s
+    return s.translate(_FORMAT_TABLE)
 
 
 def unformat_str(s: str):
     """The inverse function of format_str."""
-    reversed_map = {v: k for k, v in STR_CONVERSIONS.items()}
-    for c, sub in reversed_map.items():
+    for c, sub in _UNFORMAT_CONVERSIONS.items():
         s = s.replace(c, sub)
     return s
 
@@ -36,22 +64,20 @@ def filename_builder(
     data_type: str,
     window_length: Optional[timedelta] = timedelta(days=1),
     data_type_id: Optional[str] = None,
+    now: Optional[datetime] = None,
 ):
-    """Construct a filename based on the arguments provided."""
+    """Construct a filename based on the arguments provided. The current
+    time `now` may be provided when building many filenames at once."""
     if isinstance(start_dt, str) and start_dt != "*":
         # Convert to datetime object
-        start_dt = datetime.strptime(start_dt, STRFMT)
-        start_dt = pytz.utc.localize(start_dt)
-
-    # Set data ID
-    dtid = f"{data_type_id}_" if data_type_id else ""
+        start_dt = datetime.fromisoformat(start_dt).replace(tzinfo=timezone.utc)
 
     if start_dt != "*":
         # Get start date as string
         start_str = start_dt.strftime(STRFMT)
 
         # Check if today is in the time window
-        now = pytz.utc.localize(datetime.utcnow())
+        now = now or datetime.now(timezone.utc)
         inc = "_incomplete" if start_dt < now < start_dt + window_length else ""
 
     else:
@@ -62,14 +88,36 @@ def filename_builder(
     # Construct filename and path
     filename = os.path.join(
         download_dir,
-        format_str(
-            f"{exchange.lower()}_{dtid}{data_type}_{start_str}_{symbol}{inc}.parquet"
+        _format_filename(
+            exchange=exchange,
+            data_type=data_type,
+            data_type_id=data_type_id,
+            start_str=start_str,
+            symbol=symbol,
+            incomplete=bool(inc),
         ),
     )
 
     return filename
 
 
+def _format_filename(
+    exchange: str,
+    data_type: str,
+    data_type_id: Optional[str],
+    start_str: str,
+    symbol: str,
+    incomplete: bool = False,
+) -> str:
+    """Returns the name of a downloaded file. This is the one place the
+    name format is defined, for both downloading and loading data."""
+    dtid = f"{data_type_id}_" if data_type_id else ""
+    inc = "_incomplete" if incomplete else ""
+    return format_str(
+        f"{exchange.lower()}_{dtid}{data_type}_{start_str}_{symbol}{inc}.parquet"
+    )
+
+
 def generate_date_range(
     start_dt: datetime,
     end_dt: datetime,
@@ -78,18 +126,23 @@ def generate_date_range(
 ):
     """Generate a range of dates, returned as a list of strings."""
     td = timedelta_from_str(kwargs.get("data_type_id", "1m"))
-    if data_type in [CANDLES]:
-        # Adjust timestep
-        timestep = _timestep_from_timedelta(td)
-    else:
-        timestep = timedelta(days=1)
+    if data_type not in [CANDLES]:
+        # Daily periods
+        td = timedelta(0)
+
+    return _period_edges(start_dt, end_dt, td)[:-1].strftime(STRFMT).tolist()
 
-    date_range = []
-    current_dt = _period_start(td, start_dt)
-    while current_dt < end_dt:
-        date_range.append(current_dt.strftime(STRFMT))
-        current_dt = _period_start(td, current_dt + timestep)
-    return date_range
+
+def _period_edges(start_dt: datetime, end_dt: datetime, td: timedelta):
+    """Returns the edges of the periods data of timeframe td is stored in
+    between two dates: the start of each period, followed by the end of
+    the last. Each period runs until the start of the next."""
+    first = _period_start(td, start_dt)
+    if first >= end_dt:
+        return pd.DatetimeIndex([])
+    freq = _period_freq(td)
+    n = len(pd.date_range(first, end_dt, freq=freq, inclusive="left"))
+    return pd.date_range(first, periods=n + 1, freq=freq)
 
 
 def load_data(
@@ -100,6 +153,7 @@ def load_data(
     end_date: Optional[Union[datetime, str]] = None,
     download_dir: Optional[str] = DEFAULT_DOWNLOAD_DIR,
     include_incomplete: Optional[bool] = False,
+    precision: Optional[str] = "float64",
     **kwargs,
 ):
     """Load data from the download directory.
@@ -134,64 +188,86 @@ def load_data(
         will be logged to indicate which incomplete data sets were
         loaded. Note that this refers to incomplete days of data other
         than today, which will always be included. The default is False.
+
+    precision : str, optional
+        The precision to load prices and trade amounts in, either
+        'float32' or 'float64'. Single precision halves the memory used
+        by these columns. Candle volumes are always loaded in double
+        precision. The default is 'float64'.
     """
+    if precision not in ("float32", "float64"):
+        raise ValueError(
+            f"Precision must be 'float32' or 'float64', not '{precision}'."
+        )
+
     # TODO - test with hourly candle data
     if isinstance(start_date, str):
-        start_date = datetime.strptime(start_date, STRFMT)
+        start_date = datetime.fromisoformat(start_date)
 
     if isinstance(end_date, str):
-        end_date = datetime.strptime(end_date, STRFMT)
+        end_date = datetime.fromisoformat(end_date)
 
     def filter(unfiltered_files: list[str], match_strs: list[str]):
-        filtered_files = []
-        for filepath in unfiltered_files:
-            for filter_str in match_strs:
-                if filter_str in filepath:
-                    filtered_files.append(filepath)
-                    continue
-        return filtered_files
+        if not match_strs:
+            return []
+        search = re.compile("|".join(map(re.escape, match_strs))).search
+        return [f for f in unfiltered_files if search(os.path.basename(f))]
+
+    # List the download directory once, to check for files against
+    names = _listdir(download_dir)
+    listed = set(names)
 
     # Determine filepath building method to use
-    td = timedelta_from_str(kwargs.get("data_type_id", "1m"))
-    if data_type in [CANDLES]:
-        window = _timestep_from_timedelta(td)
-    else:
-        window = timedelta(days=1)
     if start_date is not None and end_date is not None:
         # Date range requested
-        date_range = generate_date_range(
-            start_dt=start_date, end_dt=end_date, data_type=data_type, **kwargs
-        )
         if symbols is not None:
             # Specific symbols requested too
+            data_type_id = kwargs.get("data_type_id")
+
+            # Use the same periods as the download
+            td = timedelta_from_str(kwargs.get("data_type_id", "1m"))
+            if data_type not in [CANDLES]:
+                td = timedelta(0)
+            edges = _period_edges(start_date, end_date, td)
+            if edges.tz is None:
+                edges = edges.tz_localize("UTC")
+            now = pd.Timestamp.now(tz="UTC")
             files = []
-            for date in date_range:
-                for symbol in symbols:
-                    filename = filename_builder(
-                        exchange=exchange,
-                        start_dt=date,
-                        window_length=window,
-                        download_dir=download_dir,
-                        symbol=symbol,
-                        data_type=data_type,
-                        **kwargs,
+            for start, end in zip(edges[:-1], edges[1:]):
+                # Check if today is in the time window
+                date = start.strftime(STRFMT)
+                incomplete = start < now < end
+                files += [
+                    os.path.join(
+                        download_dir,
+                        _format_filename(
+                            exchange=exchange,
+                            data_type=data_type,
+                            data_type_id=data_type_id,
+                            start_str=date,
+                            symbol=symbol,
+                            incomplete=incomplete,
+                        ),
                     )
-                    files.append(filename)
+                    for symbol in symbols
+                ]
 
         else:
             # No symbol provided, filter only by date. First get all files
             filename = filename_builder(
                 exchange=exchange,
                 start_dt="*",
-                window_length=window,
                 download_dir=download_dir,
                 symbol="*",
                 data_type=data_type,
                 **kwargs,
             )
-            all_files = glob.glob(filename)
+            all_files = _glob(filename, names)
 
             # Now filter them by the date range
+            date_range = generate_date_range(
+                start_dt=start_date, end_dt=end_date, data_type=data_type, **kwargs
+            )
             files = filter(unfiltered_files=all_files, match_strs=date_range)
 
     else:
@@ -203,26 +279,24 @@ def load_data(
                 filename = filename_builder(
                     exchange=exchange,
                     start_dt="*",
-                    window_length=window,
                     download_dir=download_dir,
                     symbol=symbol,
                     data_type=data_type,
                     **kwargs,
                 )
-                files += glob.glob(filename)
+                files += _glob(filename, names)
 
         else:
             # Get all symbols
             filename = filename_builder(
                 exchange=exchange,
                 start_dt="*",
-                window_length=window,
                 download_dir=download_dir,
                 symbol="*",
                 data_type=data_type,
                 **kwargs,
             )
-            files = glob.glob(filename)
+            files = _glob(filename, names)
 
     # Check for incomplete data
     if include_incomplete:
@@ -237,7 +311,7 @@ def load_data(
             else:
                 # Check for incomplete version
                 _incomplete_filename = "_incomplete.parquet".join(f.split(".parquet"))
-                if os.path.exists(_incomplete_filename):
+                if os.path.basename(_incomplete_filename) in listed:
                     # There is incomplete data for this date; use it
                     files[i] = _incomplete_filename
                     _no_incomplete += 1
@@ -245,24 +319,122 @@ def load_data(
                         f"Loading incomplete dataset from {_incomplete_filename}"
                     )
 
-    # Now load all data
-    df = pd.DataFrame()
-    for f in files:
-        try:
-            _df = pd.read_parquet(f)
-            _df = _df[~_df.index.duplicated(keep="first")]
-            df = pd.concat([df, _df])
-        except:
-            pass
+    # Now load all data, in date order, reading each file once
+    df = _read_files(
+        sorted({f for f in files if os.path.basename(f) in listed}),
+        precision=precision,
+    )
+
+    # Clean, only sorting if the files overlap in time
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="mergesort")
+    return _drop_duplicates(df)
+
+
+def clear_listing_cache():
+    """Clear the cached listings of download directories, for example
+    after files have been added to a directory on a filesystem which
+    doesn't update its modification time."""
+    _dir_cache.clear()
+
+
+def _listdir(directory: str) -> list[str]:
+    """Returns the names of the files in a directory. The listing is
+    cached until the directory is next modified."""
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    cached = _dir_cache.get(directory)
+    if cached is not None and cached[0] == mtime:
+        _dir_cache.move_to_end(directory)
+        return cached[1]
+
+    names = os.listdir(directory)
+    if time.time_ns() - mtime > _MTIME_RESOLUTION_NS:
+        _dir_cache[directory] = (mtime, names)
+        _dir_cache.move_to_end(directory)
+        if len(_dir_cache) > _DIR_CACHE_SIZE:
+            _dir_cache.popitem(last=False)
+    else:
+        _dir_cache.pop(directory, None)
+    return names
+
+
+@lru_cache(maxsize=256)
+def _compiled(pattern: str) -> re.Pattern:
+    """Returns the compiled regular expression of a glob pattern."""
+    return re.compile(fnmatch.translate(pattern))
+
+
+def _glob(pattern: str, names: list[str]) -> list[str]:
+    """Returns the paths matching a glob pattern, like glob.glob, but
+    from a listing of the pattern's directory."""
+    directory, pattern = os.path.split(pattern)
+    match = _compiled(pattern).match
+
+    # Only names starting with the literal part of the pattern need the
+    # regular expression
+    prefix = re.split(r"[*?[]", pattern, maxsplit=1)[0]
+    return [
+        os.path.join(directory, name)
+        for name in names
+        if name.startswith(prefix) and match(name)
+    ]
+
+
+def _read_files(files: list[str], precision: str = "float64") -> pd.DataFrame:
+    """Read downloaded files into a single dataframe. The files are read
+    in one scan, unless their schemas differ (eg. files downloaded by an
+    older version), in which case they are read one by one."""
+    if not files:
+        return pd.DataFrame()
+
+    try:
+        # The dataset casts every file to its schema, so unify the schemas
+        # of all of them, rather than taking the first file's. Each
+        # fragment keeps the footer it reads, so the scan doesn't read it
+        # again
+        dataset = ds.dataset(files, format="parquet")
+        schema = pa.unify_schemas(
+            [fragment.physical_schema for fragment in dataset.get_fragments()],
+            promote_options="permissive",
+        )
+        table = dataset.replace_schema(schema).to_table(use_threads=True)
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+    except pa.ArrowException:
+        # Read the files in parallel and concatenate them once at the end
+        with ThreadPoolExecutor(max_workers=min(32, len(files))) as executor:
+            frames = list(executor.map(_read_file, files))
+        return _with_dtypes(pd.concat(frames, sort=False), precision)
 
-    # Clean
-    df.sort_index(inplace=True)
+    if df.index.tz is None:
+        # Data downloaded before timestamps were stored as UTC
+        df.index = df.index.tz_localize("UTC")
+    return _with_dtypes(df, precision)
 
-    # Remove duplicates of timestamp-symbol pairs
-    multix = df.set_index(["symbol"], append=True)
-    df2 = multix[~multix.index.duplicated()].reset_index(level=1)
 
-    return df2
+def _with_dtypes(df: pd.DataFrame, precision: str = "float64") -> pd.DataFrame:
+    """Cast loaded data to compact dtypes: symbols to categories, and
+    prices and trade amounts to the precision requested."""
+    dtypes = {"symbol": "category"} if "symbol" in df else {}
+    dtypes.update({c: precision for c in FLOAT32_COLUMNS if c in df})
+    return df.astype(dtypes)
+
+
+def _read_file(filepath: str) -> pd.DataFrame:
+    """Read a downloaded file."""
+    df = pd.read_parquet(filepath)
+    if df.index.tz is None:
+        # Data downloaded before timestamps were stored as UTC
+        df.index = df.index.tz_localize("UTC")
+    return df
+
+
+def _drop_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """Remove duplicates of timestamp-symbol pairs, keeping the first."""
+    keys = pd.MultiIndex.from_arrays([df.index, df["symbol"]])
+    return df[~keys.duplicated()]
 
 
 def flatten_ohlcv(df: pd.DataFrame, col: Optional[str] = "Close"):
@@ -281,8 +453,18 @@ def flatten_ohlcv(df: pd.DataFrame, col: Optional[str] = "Close"):
     -------
     pd.DataFrame
     """
-    flat_df = df.pivot(columns="symbol", values=col).ffill()
-    return flat_df
+    # Only move the column being flattened
+    flat_df = df[["symbol", col]].set_index("symbol", append=True)[col]
+    return flat_df.unstack("symbol").ffill()
+
+
+@lru_cache(maxsize=16)
+def _exchange(exchange: str) -> ccxt.Exchange:
+    """Returns an exchange instance with its markets loaded, cached by
+    exchange name."""
+    instance: ccxt.Exchange = getattr(ccxt, exchange)()
+    instance.load_markets()
+    return instance
 
 
 def get_symbols(exchange: str, market_type: Optional[str] = "swap"):
@@ -293,8 +475,7 @@ def get_symbols(exchange: str, market_type: Optional[str] = "swap"):
     -------
     >>> swap_markets = get_symbols(exchange="bybit", market_type="swap")
     """
-    exchange = getattr(ccxt, exchange)()
-    markets = exchange.load_markets()
+    markets = _exchange(exchange).markets
     return [
         market["symbol"] for market in markets.values() if market["type"] == market_type
     ]
@@ -304,29 +485,27 @@ def get_tickers(
     exchange: str, threshold: Optional[float] = 0.0, market_type: Optional[str] = "swap"
 ):
     """Returns tickers, sorted by volume (in USDT)."""
-    exchange: ccxt.Exchange = getattr(ccxt, exchange)()
-    exchange.load_markets()
+    exchange = _exchange(exchange)
 
     # Get symbols
-    symbols = [
+    symbols = {
         market["symbol"]
         for market in exchange.markets.values()
         if market["type"] == market_type
-    ]
+    }
 
     # Fetch tickers
     tickers = {k: v for k, v in exchange.fetch_tickers().items() if k in symbols}
 
-    # Sort by volume
-    volumes = {v["quoteVolume"]: k for k, v in tickers.items()}
+    # Sort by volume, dropping those below the threshold
+    items = [(t["quoteVolume"] or 0.0, k, t) for k, t in tickers.items()]
+    items = [item for item in items if item[0] > threshold]
+    items.sort(key=itemgetter(0), reverse=True)
 
-    return {
-        volumes[v]: tickers[volumes[v]]
-        for v in sorted(volumes, reverse=True)
-        if v > threshold
-    }
+    return {k: t for _, k, t in items}
 
 
+@lru_cache(maxsize=32)
 def timedelta_from_str(timeframe: str) -> timedelta:
     """Returns a timedelta object from a timeframe string.
 
@@ -347,20 +526,10 @@ def timedelta_from_str(timeframe: str) -> timedelta:
     datetime.timedelta(seconds=3600)
     """
     timeframe = timeframe.lower()
-    if "s" in timeframe:
-        # Seconds
-        return timedelta(seconds=int(timeframe.split("s")[0]))
-    elif "m" in timeframe:
-        # Minutes
-        return timedelta(minutes=int(timeframe.split("m")[0]))
-    elif "h" in timeframe:
-        # Hours
-        return timedelta(hours=int(timeframe.split("h")[0]))
-    elif "d" in timeframe:
-        # Days
-        return timedelta(days=int(timeframe.split("d")[0]))
-    else:
+    match = _TIMEFRAME.match(timeframe)
+    if match is None:
         raise ValueError(f"Cannot parse timeframe '{timeframe}'.")
+    return timedelta(**{_TIMEFRAME_UNITS[match[2]]: int(match[1])})
 
 
 def _period_start(td: timedelta, start_dt: datetime):
@@ -377,33 +546,27 @@ def _period_start(td: timedelta, start_dt: datetime):
     if td >= timedelta(days=1):
         # Yearly period
         adj_start_dt = datetime(year=start_dt.year, month=1, day=1)
-        # return pytz.utc.localize(start_dt)
     elif td >= timedelta(hours=1):
         # Monthly period
         adj_start_dt = datetime(year=start_dt.year, month=start_dt.month, day=1)
-        # return pytz.utc.localize(start_dt)
     else:
         # Daily period; no adjustment needed
         return start_dt
 
     # Inherit timezone
     if start_dt.tzinfo is not None and start_dt.tzinfo.utcoffset(start_dt) is not None:
-        return pytz.utc.localize(adj_start_dt)
+        return adj_start_dt.replace(tzinfo=timezone.utc)
     else:
         return adj_start_dt
 
 
-def _timestep_from_timedelta(td: timedelta):
+def _period_freq(td: timedelta) -> str:
+    """Returns the pandas frequency of the periods data of timeframe td
+    is stored in: yearly for daily candles, monthly for hourly candles,
+    and daily otherwise."""
     if td >= timedelta(days=1):
-        # Use yearly windows
-        timestep = timedelta(days=31)
-
+        return "YS"
     elif td >= timedelta(hours=1):
-        # Use monthly windows
-        timestep = timedelta(days=31)
-
+        return "MS"
     else:
-        # Use daily windows
-        timestep = timedelta(days=1)
-
-    return timestep
+        return "D"